@@ -9,6 +9,11 @@ UniFuncs 网络搜索工具包
 """
 
 from .search_api import UniFuncsSearch
+from .hedging import HedgingPolicy
+from .archive import ResultArchiveWriter, ResultArchiveReader
+from .query_normalizer import QueryNormalizer, QueryDeduplicator
+from .transport import PooledTransport
+from .rerank import ResultMerger, merged_search
 
 __version__ = "0.1.0"
 __author__ = "AI Assistant" 
\ No newline at end of file
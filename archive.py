@@ -0,0 +1,619 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+搜索结果归档格式
+
+将搜索结果和网页解析结果追加写入按块压缩的归档文件（zstd或gzip），
+并维护一个定长记录的偏移索引文件（<归档路径>.idx），记录每条记录的键哈希、时间戳和位置。
+另有一个按键哈希排序的键表（<归档路径>.key），读取时通过内存映射在键表中二分查找，
+只有尚未写入键表的少量新记录需要顺序扫描，且只解压目标记录所在的数据块。
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+DATA_MAGIC = b"UFSA"
+INDEX_MAGIC = b"UFSI"
+KEY_MAGIC = b"UFSK"
+FORMAT_VERSION = 1
+
+CODEC_GZIP = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {"gzip": CODEC_GZIP, "zstd": CODEC_ZSTD}
+
+KIND_SEARCH = 1
+KIND_READ = 2
+KIND_NAMES = {"search": KIND_SEARCH, "read": KIND_READ}
+
+# 文件头：魔数、版本、压缩算法（仅数据文件使用）、填充
+HEADER = struct.Struct("<4sBB2x")
+# 索引项：键哈希、时间戳、块偏移、块长度、块内记录偏移、记录长度、记录类型
+INDEX_ENTRY = struct.Struct("<8sdQIIIB3x")
+# 键表：文件头之后是已排序的索引项数量，然后是按键哈希排序的（键哈希、索引项序号）
+KEY_COUNT = struct.Struct("<Q")
+KEY_ENTRY = struct.Struct("<8sQ")
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+# 键表未覆盖的索引项达到该数量时，关闭写入器时重建键表
+DEFAULT_KEY_TABLE_THRESHOLD = 4096
+
+
+def _key_hash(key):
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+
+
+def _compress(codec, data):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data)
+
+
+def _decompress(codec, data):
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _check_codec(codec):
+    if codec == CODEC_ZSTD and zstandard is None:
+        raise ValueError("归档使用zstd压缩，请先安装zstandard：pip install zstandard")
+    if codec not in (CODEC_GZIP, CODEC_ZSTD):
+        raise ValueError(f"不支持的压缩算法: {codec}")
+
+
+def _read_header(f, magic):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError("归档文件头不完整")
+    file_magic, version, codec = HEADER.unpack(header)
+    if file_magic != magic:
+        raise ValueError("不是有效的归档文件")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"不支持的归档版本: {version}")
+    return codec
+
+
+def _index_count(index_path):
+    return (os.path.getsize(index_path) - HEADER.size) // INDEX_ENTRY.size
+
+
+def _key_table_count(key_path):
+    """返回键表覆盖的索引项数量，键表不存在或无效时返回0"""
+    try:
+        with open(key_path, "rb") as f:
+            _read_header(f, KEY_MAGIC)
+            return KEY_COUNT.unpack(f.read(KEY_COUNT.size))[0]
+    except (OSError, ValueError, struct.error):
+        return 0
+
+
+def build_key_table(path):
+    """
+    为归档重建按键哈希排序的键表（<归档路径>.key），使按键查找可以二分查找
+
+    参数:
+        path (str): 归档文件路径
+
+    返回:
+        int: 键表覆盖的索引项数量
+    """
+    index_path = path + ".idx"
+    key_path = path + ".key"
+    count = _index_count(index_path)
+
+    with open(index_path, "rb") as f:
+        _read_header(f, INDEX_MAGIC)
+        entries = f.read(count * INDEX_ENTRY.size)
+    keys = sorted(
+        (entry[0], position)
+        for position, entry in enumerate(INDEX_ENTRY.iter_unpack(entries))
+    )
+
+    # 先写临时文件再替换，读取方不会看到写了一半的键表
+    tmp_path = key_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(KEY_MAGIC, FORMAT_VERSION, 0))
+        f.write(KEY_COUNT.pack(count))
+        for key_hash, position in keys:
+            f.write(KEY_ENTRY.pack(key_hash, position))
+    os.replace(tmp_path, key_path)
+    return count
+
+
+def _lock_file(f):
+    """对文件加排他锁，已被其他进程锁定时等待"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    elif msvcrt is not None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _to_timestamp(value):
+    """将datetime、ISO格式字符串或数字转换为时间戳"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+class ResultArchiveWriter:
+    """
+    归档写入器，只追加写入
+
+    写入器在整个生命周期内持有归档的排他锁（<归档路径>.lock），
+    同一归档同时只能有一个写入器，其他写入器会等待锁释放。
+
+    参数:
+        path (str): 归档文件路径，索引文件为path + ".idx"
+        codec (str, 可选): 压缩算法，可选值：zstd、gzip；默认在安装了zstandard时使用zstd。
+                           向已有归档追加时沿用归档原有的压缩算法
+        block_size (int): 数据块的未压缩大小上限（字节），默认为256KB
+        key_table_threshold (int): 键表未覆盖的记录达到该数量时，关闭时重建键表，默认为4096
+    """
+
+    def __init__(self, path, codec=None, block_size=DEFAULT_BLOCK_SIZE,
+                 key_table_threshold=DEFAULT_KEY_TABLE_THRESHOLD):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.key_path = path + ".key"
+        self.block_size = block_size
+        self.key_table_threshold = key_table_threshold
+        self._buffer = []
+        self._buffer_size = 0
+
+        if codec is None:
+            codec = "zstd" if zstandard is not None else "gzip"
+        if codec not in CODEC_NAMES:
+            raise ValueError(f"不支持的压缩算法: {codec}")
+
+        # 检查和恢复归档都在锁内进行，避免与其他写入器交错
+        self._lock = open(path + ".lock", "a+b")
+        _lock_file(self._lock)
+        try:
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                with open(path, "rb") as f:
+                    self.codec = _read_header(f, DATA_MAGIC)
+                _check_codec(self.codec)
+                self._recover()
+                self._data = open(path, "ab")
+                self._index = open(self.index_path, "ab")
+            else:
+                self.codec = CODEC_NAMES[codec]
+                _check_codec(self.codec)
+                self._data = open(path, "wb")
+                self._data.write(HEADER.pack(DATA_MAGIC, FORMAT_VERSION, self.codec))
+                self._index = open(self.index_path, "wb")
+                self._index.write(HEADER.pack(INDEX_MAGIC, FORMAT_VERSION, 0))
+                self._data.flush()
+                self._index.flush()
+        except BaseException:
+            self._release_lock()
+            raise
+
+    def _release_lock(self):
+        _unlock_file(self._lock)
+        self._lock.close()
+
+    def _recover(self):
+        """截断中断写入留下的不完整索引项和未被索引的数据块"""
+        data_end = HEADER.size
+        index_valid = False
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "rb") as f:
+                    _read_header(f, INDEX_MAGIC)
+                index_valid = True
+            except ValueError:
+                pass
+
+        if not index_valid:
+            # 数据块没有自描述的边界，无法从数据文件重建索引，不能截断数据
+            if os.path.getsize(self.path) > HEADER.size:
+                raise ValueError(f"归档索引缺失或已损坏，拒绝追加: {self.index_path}")
+            with open(self.index_path, "wb") as f:
+                f.write(HEADER.pack(INDEX_MAGIC, FORMAT_VERSION, 0))
+        else:
+            size = os.path.getsize(self.index_path)
+            count = (size - HEADER.size) // INDEX_ENTRY.size
+            index_end = HEADER.size + count * INDEX_ENTRY.size
+            with open(self.index_path, "r+b") as f:
+                if count:
+                    f.seek(index_end - INDEX_ENTRY.size)
+                    entry = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+                    data_end = entry[2] + entry[3]
+                f.truncate(index_end)
+
+            with open(self.path, "r+b") as f:
+                f.truncate(data_end)
+
+        # 键表引用了被截断的索引项时，删除键表以免指向之后写入的其他记录
+        if _key_table_count(self.key_path) > _index_count(self.index_path):
+            os.remove(self.key_path)
+
+    def append(self, key, result, kind="search", timestamp=None):
+        """
+        追加一条记录
+
+        参数:
+            key (str): 记录的键，搜索结果为查询词，网页解析结果为URL
+            result (dict): API返回的结果
+            kind (str): 记录类型，可选值：search、read，默认为search
+            timestamp (float, 可选): 记录时间戳，默认为当前时间
+        """
+        if kind not in KIND_NAMES:
+            raise ValueError(f"不支持的记录类型: {kind}")
+        timestamp = time.time() if timestamp is None else _to_timestamp(timestamp)
+        record = json.dumps({
+            "key": key,
+            "kind": kind,
+            "timestamp": timestamp,
+            "result": result
+        }, ensure_ascii=False).encode("utf-8")
+
+        self._buffer.append((_key_hash(key), timestamp, KIND_NAMES[kind], record))
+        self._buffer_size += len(record)
+        if self._buffer_size >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        """将缓冲的记录压缩为一个数据块写入归档"""
+        if not self._buffer:
+            return
+
+        block = b"".join(record for _, _, _, record in self._buffer)
+        compressed = _compress(self.codec, block)
+        # 以文件的实际长度作为块偏移，而不是写入器自己记录的位置
+        block_offset = os.fstat(self._data.fileno()).st_size
+        self._data.write(compressed)
+        self._data.flush()
+
+        # 先写数据块再写索引，保证索引不会指向不存在的数据
+        record_offset = 0
+        for key_hash, timestamp, kind, record in self._buffer:
+            self._index.write(INDEX_ENTRY.pack(key_hash, timestamp, block_offset, len(compressed),
+                                               record_offset, len(record), kind))
+            record_offset += len(record)
+        self._index.flush()
+
+        self._buffer = []
+        self._buffer_size = 0
+
+    def close(self):
+        """写入剩余记录、关闭文件并释放锁"""
+        if self._data.closed:
+            return
+        try:
+            self.flush()
+            self._data.close()
+            self._index.close()
+
+            if _index_count(self.index_path) - _key_table_count(self.key_path) >= self.key_table_threshold:
+                build_key_table(self.path)
+        finally:
+            self._release_lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ResultArchiveReader:
+    """
+    归档读取器
+
+    参数:
+        path (str): 归档文件路径
+        cache_blocks (int): 缓存的已解压数据块数量，默认为8
+    """
+
+    def __init__(self, path, cache_blocks=8):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.key_path = path + ".key"
+        self.cache_blocks = cache_blocks
+        self._blocks = OrderedDict()
+        self._data = None
+        self._index = None
+        self._keys = None
+        self._data_map = None
+        self._index_map = None
+        self._key_map = None
+        self._key_count = 0
+        self.refresh()
+
+    def refresh(self):
+        """重新映射归档文件，以读取打开之后追加的记录"""
+        self._unmap()
+        self._data = open(self.path, "rb")
+        self.codec = _read_header(self._data, DATA_MAGIC)
+        _check_codec(self.codec)
+        self._index = open(self.index_path, "rb")
+        _read_header(self._index, INDEX_MAGIC)
+
+        self._data_map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        index_size = os.path.getsize(self.index_path)
+        self._count = (index_size - HEADER.size) // INDEX_ENTRY.size
+        self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._keys = self._key_map = None
+        self._key_count = _key_table_count(self.key_path)
+        if 0 < self._key_count <= self._count:
+            self._keys = open(self.key_path, "rb")
+            self._key_map = mmap.mmap(self._keys.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._key_count = 0
+        self._blocks.clear()
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._index_map, HEADER.size + position * INDEX_ENTRY.size)
+
+    def _key_table_positions(self, key_hash):
+        """在键表中二分查找键哈希，返回匹配的索引项序号"""
+        base = HEADER.size + KEY_COUNT.size
+        low, high = 0, self._key_count
+        while low < high:
+            middle = (low + high) // 2
+            offset = base + middle * KEY_ENTRY.size
+            if self._key_map[offset:offset + 8] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+
+        positions = []
+        while low < self._key_count:
+            entry_hash, position = KEY_ENTRY.unpack_from(self._key_map, base + low * KEY_ENTRY.size)
+            if entry_hash != key_hash:
+                break
+            positions.append(position)
+            low += 1
+        return positions
+
+    def _tail_positions(self, key_hash):
+        """顺序扫描键表尚未覆盖的新索引项"""
+        start = HEADER.size + self._key_count * INDEX_ENTRY.size
+        end = HEADER.size + self._count * INDEX_ENTRY.size
+        positions = []
+        offset = self._index_map.find(key_hash, start, end)
+        while offset != -1:
+            if (offset - HEADER.size) % INDEX_ENTRY.size == 0:
+                positions.append((offset - HEADER.size) // INDEX_ENTRY.size)
+            offset = self._index_map.find(key_hash, offset + 1, end)
+        return positions
+
+    def _block(self, offset, length):
+        block = self._blocks.get(offset)
+        if block is None:
+            block = _decompress(self.codec, self._data_map[offset:offset + length])
+            self._blocks[offset] = block
+            if len(self._blocks) > self.cache_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(offset)
+        return block
+
+    def _record(self, entry):
+        _, _, block_offset, block_length, record_offset, record_length, _ = entry
+        block = self._block(block_offset, block_length)
+        return json.loads(block[record_offset:record_offset + record_length].decode("utf-8"))
+
+    @staticmethod
+    def _matches(entry, kind, since, until):
+        _, timestamp, _, _, _, _, entry_kind = entry
+        if kind is not None and entry_kind != KIND_NAMES[kind]:
+            return False
+        if since is not None and timestamp < since:
+            return False
+        if until is not None and timestamp > until:
+            return False
+        return True
+
+    def lookup(self, key, kind=None, since=None, until=None):
+        """
+        按键查找记录
+
+        参数:
+            key (str): 查询词或URL
+            kind (str, 可选): 记录类型，可选值：search、read
+            since (可选): 起始时间（时间戳、datetime或ISO格式字符串）
+            until (可选): 结束时间（时间戳、datetime或ISO格式字符串）
+
+        返回:
+            list: 匹配的记录，按时间从新到旧排列
+        """
+        key_hash = _key_hash(key)
+        since, until = _to_timestamp(since), _to_timestamp(until)
+        records = []
+
+        positions = []
+        if self._key_map is not None:
+            positions = self._key_table_positions(key_hash)
+        positions += self._tail_positions(key_hash)
+
+        for position in positions:
+            entry = self._entry(position)
+            if self._matches(entry, kind, since, until):
+                record = self._record(entry)
+                # 排除哈希碰撞
+                if record["key"] == key:
+                    records.append(record)
+
+        records.sort(key=lambda record: record["timestamp"], reverse=True)
+        return records
+
+    def get(self, key, kind=None):
+        """
+        获取某个键最新的一条记录
+
+        返回:
+            dict: 记录，包含key、kind、timestamp和result字段；不存在时返回None
+        """
+        records = self.lookup(key, kind)
+        return records[0] if records else None
+
+    def iter_records(self, kind=None, since=None, until=None):
+        """
+        按写入顺序遍历记录，每个数据块只解压一次
+
+        参数与lookup相同（不含key）
+        """
+        since, until = _to_timestamp(since), _to_timestamp(until)
+        for position in range(self._count):
+            entry = self._entry(position)
+            if self._matches(entry, kind, since, until):
+                yield self._record(entry)
+
+    def _unmap(self):
+        for resource in (self._data_map, self._index_map, self._key_map,
+                         self._data, self._index, self._keys):
+            if resource is not None:
+                resource.close()
+
+    def close(self):
+        """关闭归档文件"""
+        self._unmap()
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _infer_key(result, kind):
+    """从API结果中推断记录的键"""
+    data = result.get("data") if isinstance(result, dict) else None
+    if not isinstance(data, dict):
+        return None
+    return data.get("query") if kind == "search" else data.get("url")
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(sep=" ", timespec="seconds")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UniFuncs 搜索结果归档工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    append_parser = subparsers.add_parser("append", help="将JSON格式的结果文件追加到归档")
+    append_parser.add_argument("archive", help="归档文件路径")
+    append_parser.add_argument("files", nargs="+", help="JSON结果文件（如cli.py -o json -s保存的文件）")
+    append_parser.add_argument("--key", help="记录的键，默认从结果中读取查询词或URL")
+    append_parser.add_argument("--kind", choices=list(KIND_NAMES), default="search", help="记录类型")
+    append_parser.add_argument("--codec", choices=list(CODEC_NAMES), help="新建归档时使用的压缩算法")
+
+    get_parser = subparsers.add_parser("get", help="按查询词或URL查找记录")
+    get_parser.add_argument("archive", help="归档文件路径")
+    get_parser.add_argument("key", help="查询词或URL")
+    get_parser.add_argument("--kind", choices=list(KIND_NAMES), help="记录类型")
+    get_parser.add_argument("--all", action="store_true", help="输出所有历史记录，而不仅是最新一条")
+
+    list_parser = subparsers.add_parser("list", help="遍历归档中的记录")
+    list_parser.add_argument("archive", help="归档文件路径")
+    list_parser.add_argument("--kind", choices=list(KIND_NAMES), help="记录类型")
+    list_parser.add_argument("--since", help="起始时间（ISO格式，如2024-01-01）")
+    list_parser.add_argument("--until", help="结束时间（ISO格式）")
+    list_parser.add_argument("--json", action="store_true", help="以JSON Lines格式输出完整记录")
+
+    reindex_parser = subparsers.add_parser("reindex", help="重建按键排序的键表，加快查找")
+    reindex_parser.add_argument("archive", help="归档文件路径")
+
+    args = parser.parse_args()
+
+    try:
+        _run_command(args)
+    except (OSError, ValueError) as e:
+        print(f"处理归档时出错: {e}")
+        sys.exit(1)
+
+
+def _run_command(args):
+    """执行归档命令"""
+    if args.command == "append":
+        with ResultArchiveWriter(args.archive, codec=args.codec) as writer:
+            for path in args.files:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        result = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"读取文件失败: {path} ({e})")
+                    continue
+                key = args.key or _infer_key(result, args.kind)
+                if not key:
+                    print(f"无法确定记录的键，请使用--key指定: {path}")
+                    continue
+                writer.append(key, result, kind=args.kind, timestamp=os.path.getmtime(path))
+                print(f"已追加: {key}")
+
+    elif args.command == "get":
+        with ResultArchiveReader(args.archive) as reader:
+            records = reader.lookup(args.key, kind=args.kind)
+            if not records:
+                print(f"未找到记录: {args.key}")
+                sys.exit(1)
+            if not args.all:
+                records = records[:1]
+            for record in records:
+                print(json.dumps(record, ensure_ascii=False, indent=2))
+
+    elif args.command == "list":
+        try:
+            since, until = _to_timestamp(args.since), _to_timestamp(args.until)
+        except ValueError:
+            print("时间格式无效，请使用ISO格式，如2024-01-01或2024-01-01T08:00:00")
+            sys.exit(1)
+        with ResultArchiveReader(args.archive) as reader:
+            for record in reader.iter_records(kind=args.kind, since=since, until=until):
+                if args.json:
+                    print(json.dumps(record, ensure_ascii=False))
+                else:
+                    print(f"{_format_time(record['timestamp'])}\t{record['kind']}\t{record['key']}")
+
+    elif args.command == "reindex":
+        count = build_key_table(args.archive)
+        print(f"键表已重建，共{count}条记录")
+
+
+if __name__ == "__main__":
+    main()
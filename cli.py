@@ -14,6 +14,7 @@ def main():
     parser.add_argument("-c", "--count", type=int, default=10, help="每页结果数量")
     parser.add_argument("-o", "--output", choices=["text", "json", "markdown"], default="text", help="输出格式")
     parser.add_argument("-s", "--save", help="将结果保存到文件")
+    parser.add_argument("-a", "--archive", help="将原始结果追加到归档文件（见archive.py）")
     
     args = parser.parse_args()
     
@@ -21,7 +22,8 @@ def main():
     search_client = UniFuncsSearch(args.key)
     
     if not args.query:
-        # 如果没有通过命令行参数提供查询，则提示用户输入
+        # 如果没有通过命令行参数提供查询，则提示用户输入，同时在后台预热连接
+        search_client.warm_up()
         query = input("请输入搜索关键词: ")
         if not query.strip():
             print("错误: 未提供搜索关键词")
@@ -37,6 +39,18 @@ def main():
         count=args.count
     )
     
+    # 追加到归档
+    if args.archive and ("error" in results or results.get("code") != 0):
+        print("搜索失败，未追加到归档")
+    elif args.archive:
+        from archive import ResultArchiveWriter
+        try:
+            with ResultArchiveWriter(args.archive) as writer:
+                writer.append(query, results, kind="search")
+            print(f"搜索结果已追加到归档: {args.archive}")
+        except (OSError, ValueError) as e:
+            print(f"追加归档时出错: {e}")
+    
     # 格式化结果
     formatted_output = search_client.format_results(results, args.output)
     
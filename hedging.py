@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+对冲请求（hedged requests）策略
+
+当一次请求在历史延迟的某个分位数阈值内仍未返回时，再发出一个相同的请求，
+取先成功返回的结果并丢弃另一个请求的结果，以降低尾部延迟。
+对冲请求的数量受预算限制，不会超过总请求量的设定比例。
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _percentile(samples, percentile):
+    """计算样本的分位数（最近秩法），样本为空时返回None"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(percentile / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _is_error(result):
+    """判断请求结果是否为本地错误（网络异常或解析失败）"""
+    return isinstance(result, dict) and "error" in result
+
+
+class HedgingPolicy:
+    """
+    对冲请求策略
+
+    参数:
+        percentile (float): 触发对冲的延迟分位数阈值，默认为95
+        budget (float): 对冲请求占总请求量的最大比例，默认为0.05（5%）
+        min_samples (int): 计算分位数阈值所需的最少样本数，样本不足时使用initial_delay
+        initial_delay (float): 样本不足时的对冲等待时间（秒），默认为2.0
+        window (int): 用于计算阈值的最近延迟样本数量，默认为500
+        max_workers (int): 执行请求的线程数量，默认为8
+    """
+
+    def __init__(self, percentile=95, budget=0.05, min_samples=20, initial_delay=2.0,
+                 window=500, max_workers=8):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile必须在0到100之间")
+        if not 0 <= budget <= 1:
+            raise ValueError("budget必须在0到1之间")
+
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="unifuncs-hedge")
+        self._lock = threading.Lock()
+
+        # 原始请求的延迟（无论是否被对冲），用于计算对冲阈值和“未对冲时”的p99
+        self._primary_latencies = deque(maxlen=window)
+        # 调用方实际感受到的延迟
+        self._effective_latencies = deque(maxlen=window)
+
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._budget_denied = 0
+
+    def hedge_delay(self):
+        """返回当前的对冲等待时间（秒）"""
+        with self._lock:
+            if len(self._primary_latencies) < self.min_samples:
+                return self.initial_delay
+            return _percentile(self._primary_latencies, self.percentile)
+
+    def _acquire_hedge(self):
+        """检查对冲预算，允许时计入一次对冲"""
+        with self._lock:
+            if self._hedges + 1 > self.budget * self._requests:
+                self._budget_denied += 1
+                return False
+            self._hedges += 1
+            return True
+
+    def _record_primary(self, started):
+        """返回记录原始请求延迟的回调，即使其结果已被丢弃也会记录"""
+        def callback(future):
+            if future.cancelled():
+                return
+            with self._lock:
+                self._primary_latencies.append(time.monotonic() - started)
+        return callback
+
+    def execute(self, func, *args, **kwargs):
+        """
+        按对冲策略执行请求函数
+
+        参数:
+            func (callable): 发送请求的函数，返回API结果字典
+            *args, **kwargs: 传递给func的参数
+
+        返回:
+            dict: 先成功返回的请求结果；两个请求都失败时返回原始请求的结果
+        """
+        delay = self.hedge_delay()
+        started = time.monotonic()
+        with self._lock:
+            self._requests += 1
+
+        primary = self._executor.submit(func, *args, **kwargs)
+        primary.add_done_callback(self._record_primary(started))
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._acquire_hedge():
+            result = primary.result()
+            self._record_effective(started)
+            return result
+
+        hedge = self._executor.submit(func, *args, **kwargs)
+        pending = {primary, hedge}
+        result = None
+        winner = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate = future.result()
+                if winner is None or (_is_error(result) and not _is_error(candidate)):
+                    result, winner = candidate, future
+            if not _is_error(result):
+                break
+
+        if _is_error(result):
+            # 两个请求都失败时返回原始请求的错误
+            result, winner = primary.result(), primary
+
+        # 尚未开始的请求不再发送；已在发送中的HTTP请求无法中断，其结果将被丢弃
+        for future in pending:
+            future.cancel()
+
+        with self._lock:
+            if winner is hedge:
+                self._hedge_wins += 1
+        self._record_effective(started)
+        return result
+
+    def _record_effective(self, started):
+        with self._lock:
+            self._effective_latencies.append(time.monotonic() - started)
+
+    def get_stats(self):
+        """
+        获取对冲统计信息
+
+        返回:
+            dict: 包含请求数、对冲数、对冲占比（额外开销）、对冲胜出次数，
+                  以及未对冲与实际的p99延迟（秒）和p99改善幅度
+        """
+        with self._lock:
+            primary_p99 = _percentile(self._primary_latencies, 99)
+            effective_p99 = _percentile(self._effective_latencies, 99)
+            requests_count = self._requests
+            return {
+                "requests": requests_count,
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+                "budget_denied": self._budget_denied,
+                "extra_cost": self._hedges / requests_count if requests_count else 0.0,
+                "hedge_delay": (_percentile(self._primary_latencies, self.percentile)
+                                if len(self._primary_latencies) >= self.min_samples
+                                else self.initial_delay),
+                "p99_unhedged": primary_p99,
+                "p99_effective": effective_p99,
+                "p99_gain": (primary_p99 - effective_p99
+                             if primary_p99 is not None and effective_p99 is not None else None),
+            }
+
+    def shutdown(self, wait=False):
+        """关闭内部线程池"""
+        self._executor.shutdown(wait=wait)
@@ -1,106 +1,195 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from search_api import UniFuncsSearch
 
+class SessionResultStore:
+    """
+    交互会话中的搜索结果存储
+
+    在后台线程中执行搜索，并保存本次会话中已获取的结果，
+    切换输出格式、重新显示或翻回已看过的页面时无需再次调用API。
+    """
+
+    def __init__(self, search_client, max_workers=2):
+        self.search_client = search_client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def submit(self, query, freshness, count, page=1):
+        """在后台开始搜索（已有结果或正在搜索时直接复用），返回Future"""
+        key = (query, freshness, count, page)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self._executor.submit(self.search_client.search, query, freshness, True, page, count)
+                self._futures[key] = future
+            return future
+
+    def get(self, query, freshness, count, page=1):
+        """获取搜索结果，必要时等待后台搜索完成"""
+        key = (query, freshness, count, page)
+        results = self.submit(query, freshness, count, page).result()
+        if "error" in results or results.get("code") != 0:
+            # 失败的结果不保留，下次获取时重新搜索
+            with self._lock:
+                self._futures.pop(key, None)
+        return results
+
+    def shutdown(self):
+        """关闭后台线程，不等待尚未开始的预取"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def choose_output_format():
+    """询问输出格式"""
+    print("\n请选择输出格式:")
+    print("1. 文本 (默认)")
+    print("2. JSON")
+    print("3. Markdown")
+
+    format_choice = input("请选择: ").strip()
+
+    format_map = {
+        "1": "text",
+        "2": "json",
+        "3": "markdown"
+    }
+
+    return format_map.get(format_choice, "text")
+
+def save_results(formatted_results, output_format):
+    """询问文件名并保存格式化后的结果"""
+    filename = input("请输入文件名: ")
+    if not filename:
+        print("未提供文件名，跳过保存")
+        return
+
+    if '.' not in filename:
+        # 根据输出格式添加适当的扩展名
+        if output_format == "json":
+            filename += ".json"
+        elif output_format == "markdown":
+            filename += ".md"
+        else:
+            filename += ".txt"
+
+    try:
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(formatted_results)
+        print(f"结果已保存到: {filename}")
+    except Exception as e:
+        print(f"保存失败: {e}")
+
 def interactive_search():
     """交互式命令行搜索界面"""
-    
+
     print("="*50)
     print("  UniFuncs 网络搜索交互界面")
     print("="*50)
-    
-    # 创建搜索客户端
-    search_client = UniFuncsSearch()
-    
-    while True:
-        # 获取用户输入
-        query = input("\n请输入搜索关键词 (输入q退出): ")
-        
-        if query.lower() in ('q', 'quit', 'exit'):
-            print("\n谢谢使用，再见!")
-            break
-            
-        if not query.strip():
-            print("请输入有效的搜索关键词")
-            continue
-            
-        # 获取时效性选择
-        print("\n请选择搜索结果时效性:")
-        print("1. 一天内")
-        print("2. 一周内")
-        print("3. 一个月内")
-        print("4. 一年内")
-        print("5. 不限")
-        
-        choice = input("请选择 (默认不限): ").strip()
-        
-        freshness_map = {
-            "1": "Day",
-            "2": "Week",
-            "3": "Month",
-            "4": "Year"
-        }
-        
-        freshness = freshness_map.get(choice)
-        
-        # 获取结果数量
-        count_input = input("\n请输入返回结果数量 (1-50，默认5): ").strip()
-        try:
-            count = int(count_input) if count_input else 5
-            if count < 1 or count > 50:
-                print("结果数量超出范围，使用默认值5")
+
+    # 创建搜索客户端，在用户输入期间后台预热连接
+    search_client = UniFuncsSearch(warmup=True)
+    store = SessionResultStore(search_client)
+
+    try:
+        while True:
+            # 获取用户输入
+            query = input("\n请输入搜索关键词 (输入q退出): ")
+
+            if query.lower() in ('q', 'quit', 'exit'):
+                print("\n谢谢使用，再见!")
+                break
+
+            if not query.strip():
+                print("请输入有效的搜索关键词")
+                continue
+
+            # 获取时效性选择
+            print("\n请选择搜索结果时效性:")
+            print("1. 一天内")
+            print("2. 一周内")
+            print("3. 一个月内")
+            print("4. 一年内")
+            print("5. 不限")
+
+            choice = input("请选择 (默认不限): ").strip()
+
+            freshness_map = {
+                "1": "Day",
+                "2": "Week",
+                "3": "Month",
+                "4": "Year"
+            }
+
+            freshness = freshness_map.get(choice)
+
+            # 获取结果数量
+            count_input = input("\n请输入返回结果数量 (1-50，默认5): ").strip()
+            try:
+                count = int(count_input) if count_input else 5
+                if count < 1 or count > 50:
+                    print("结果数量超出范围，使用默认值5")
+                    count = 5
+            except ValueError:
+                print("输入无效，使用默认值5")
                 count = 5
-        except ValueError:
-            print("输入无效，使用默认值5")
-            count = 5
-            
-        # 获取输出格式
-        print("\n请选择输出格式:")
-        print("1. 文本 (默认)")
-        print("2. JSON")
-        print("3. Markdown")
-        
-        format_choice = input("请选择: ").strip()
-        
-        format_map = {
-            "1": "text",
-            "2": "json",
-            "3": "markdown"
-        }
-        
-        output_format = format_map.get(format_choice, "text")
-        
-        # 执行搜索
-        print("\n正在搜索，请稍候...\n")
-        results = search_client.search(query, freshness, True, 1, count)
-        formatted_results = search_client.format_results(results, output_format)
-        
-        # 显示结果
-        print(formatted_results)
-        
-        # 询问是否保存结果
-        save_choice = input("\n是否保存结果到文件? (y/n): ").lower()
-        if save_choice == 'y':
-            filename = input("请输入文件名: ")
-            if not filename:
-                print("未提供文件名，跳过保存")
-            else:
-                if '.' not in filename:
-                    # 根据输出格式添加适当的扩展名
-                    if output_format == "json":
-                        filename += ".json"
-                    elif output_format == "markdown":
-                        filename += ".md"
+
+            # 搜索参数已确定，在用户选择输出格式时后台开始搜索
+            page = 1
+            store.submit(query, freshness, count, page)
+
+            output_format = choose_output_format()
+
+            print("\n正在搜索，请稍候...\n")
+
+            show = True
+            while True:
+                if show:
+                    # 显示结果；当前页成功且已满时，才在用户阅读时后台预取下一页
+                    results = store.get(query, freshness, count, page)
+                    formatted_results = search_client.format_results(results, output_format)
+                    print(f"[第{page}页]")
+                    print(formatted_results)
+                    has_next = (
+                        "error" not in results and results.get("code") == 0
+                        and len(results.get("data", {}).get("webPages", [])) >= count
+                    )
+                    if has_next:
+                        store.submit(query, freshness, count, page + 1)
+                show = True
+
+                action = input("\n操作: n 下一页 / p 上一页 / f 切换格式 / r 重新显示 / s 保存 / 回车 新搜索 / q 退出: ").strip().lower()
+
+                if action == 'n':
+                    if has_next:
+                        page += 1
+                    else:
+                        print("没有更多结果了")
+                        show = False
+                elif action == 'p':
+                    if page > 1:
+                        page -= 1
                     else:
-                        filename += ".txt"
-                
-                try:
-                    with open(filename, "w", encoding="utf-8") as f:
-                        f.write(formatted_results)
-                    print(f"结果已保存到: {filename}")
-                except Exception as e:
-                    print(f"保存失败: {e}")
+                        print("已经是第一页")
+                        show = False
+                elif action == 'f':
+                    output_format = choose_output_format()
+                elif action == 'r':
+                    pass
+                elif action == 's':
+                    save_results(formatted_results, output_format)
+                    show = False
+                elif action in ('q', 'quit', 'exit'):
+                    print("\n谢谢使用，再见!")
+                    return
+                else:
+                    break
+    finally:
+        store.shutdown()
 
 if __name__ == "__main__":
-    interactive_search() 
\ No newline at end of file
+    interactive_search()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+查询归一化与请求去重
+
+将大小写、全角/半角、空白、标点或词序不同但含义相同的查询归一化为同一个键，
+用于结果缓存和合并进行中的相同请求（single-flight），使等价查询只调用一次API。
+"""
+
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# 中日韩文字范围：统一表意文字及扩展A、兼容表意文字、假名、谚文
+_CJK_RANGES = (
+    ("\u3040", "\u30ff"),
+    ("\u3400", "\u4dbf"),
+    ("\u4e00", "\u9fff"),
+    ("\uac00", "\ud7af"),
+    ("\uf900", "\ufaff"),
+)
+
+
+def _is_cjk(char):
+    return any(start <= char <= end for start, end in _CJK_RANGES)
+
+
+def _is_error(result):
+    """判断结果是否为错误，错误结果不进入缓存"""
+    return not isinstance(result, dict) or "error" in result or result.get("code") != 0
+
+
+class QueryNormalizer:
+    """
+    查询归一化器
+
+    参数:
+        nfkc (bool): 是否进行Unicode NFKC归一化（全角字符转半角等），默认为True
+        casefold (bool): 是否忽略大小写，默认为True
+        fold_punctuation (bool): 是否将标点视为分隔符，默认为True
+        keep_chars (str): 折叠标点时始终保留的字符，默认为"#+"（如c#、c++）
+        joiners (str): 位于两个字母或数字之间时保留的标点，默认为".-_'/"（如node.js、3.5、e-mail）
+        sort_terms (bool): 是否对查询词排序并去重，默认为False
+    """
+
+    def __init__(self, nfkc=True, casefold=True, fold_punctuation=True, keep_chars="#+",
+                 joiners=".-_'/", sort_terms=False):
+        self.nfkc = nfkc
+        self.casefold = casefold
+        self.fold_punctuation = fold_punctuation
+        self.keep_chars = keep_chars
+        self.joiners = joiners
+        self.sort_terms = sort_terms
+
+    def _fold_punctuation(self, text):
+        chars = []
+        for i, char in enumerate(text):
+            if (unicodedata.category(char).startswith("P") and char not in self.keep_chars
+                    and not (char in self.joiners and 0 < i < len(text) - 1
+                             and text[i - 1].isascii() and text[i - 1].isalnum()
+                             and text[i + 1].isascii() and text[i + 1].isalnum())):
+                chars.append(" ")
+            else:
+                chars.append(char)
+        return "".join(chars)
+
+    def normalize(self, query):
+        """
+        归一化查询
+
+        参数:
+            query (str): 原始查询
+
+        返回:
+            str: 归一化后的查询
+        """
+        text = query
+        if self.nfkc:
+            text = unicodedata.normalize("NFKC", text)
+        if self.casefold:
+            text = text.casefold()
+        if self.fold_punctuation:
+            text = self._fold_punctuation(text)
+
+        terms = text.split()
+        if self.sort_terms:
+            terms = sorted(set(terms))
+
+        # 与中日韩文字相邻的空白没有分词意义（如"AI 大模型"与"AI大模型"），拼接时去掉
+        output = ""
+        for term in terms:
+            if output and not (_is_cjk(output[-1]) or _is_cjk(term[0])):
+                output += " "
+            output += term
+        return output
+
+    def make_key(self, query, **params):
+        """
+        生成缓存键
+
+        参数:
+            query (str): 原始查询
+            **params: 其他影响结果的请求参数（如freshness、page、count）
+
+        返回:
+            str: 缓存键
+        """
+        return json.dumps([self.normalize(query), params], sort_keys=True, ensure_ascii=False)
+
+
+class _InFlight:
+    """进行中的请求"""
+
+    def __init__(self, query):
+        self.query = query
+        self.event = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class QueryDeduplicator:
+    """
+    基于归一化查询的结果缓存和请求合并
+
+    参数:
+        normalizer (QueryNormalizer, 可选): 查询归一化器，默认使用QueryNormalizer()
+        ttl (float): 缓存有效期（秒），为0时只合并进行中的请求，默认为300
+        max_entries (int): 最多缓存的结果数量，默认为1024
+    """
+
+    def __init__(self, normalizer=None, ttl=300, max_entries=1024):
+        self.normalizer = normalizer or QueryNormalizer()
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        # 键 -> (过期时间, 首次请求的原始查询, 结果)
+        self._cache = OrderedDict()
+        self._in_flight = {}
+
+        self._requests = 0
+        self._api_calls = 0
+        self._cache_hits = 0
+        self._coalesced = 0
+        self._variant_hits = 0
+
+    def execute(self, func, query, **params):
+        """
+        执行去重后的请求
+
+        参数:
+            func (callable): 无参数的请求函数，返回API结果字典
+            query (str): 原始查询
+            **params: 其他影响结果的请求参数
+
+        返回:
+            dict: API结果；等价查询共享同一个结果
+        """
+        key = self.normalizer.make_key(query, **params)
+
+        with self._lock:
+            self._requests += 1
+            entry = self._cache.get(key)
+            if entry is not None:
+                expires, origin, result = entry
+                if expires > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self._cache_hits += 1
+                    if origin != query:
+                        self._variant_hits += 1
+                    return result
+                del self._cache[key]
+
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _InFlight(query)
+                self._api_calls += 1
+            else:
+                self._coalesced += 1
+                if call.query != query:
+                    self._variant_hits += 1
+
+        if not leader:
+            call.event.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if call.exception is None and self.ttl > 0 and not _is_error(call.result):
+                    self._cache[key] = (time.monotonic() + self.ttl, query, call.result)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+            call.event.set()
+        return call.result
+
+    def clear(self):
+        """清空结果缓存"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self):
+        """
+        获取去重统计信息
+
+        返回:
+            dict: 包含请求数、实际API调用数、缓存命中数、合并的进行中请求数、
+                  被合并的重复请求总数及占比，以及其中由归一化（而非完全相同的查询）合并的数量
+        """
+        with self._lock:
+            collapsed = self._cache_hits + self._coalesced
+            return {
+                "requests": self._requests,
+                "api_calls": self._api_calls,
+                "cache_hits": self._cache_hits,
+                "coalesced": self._coalesced,
+                "collapsed": collapsed,
+                "collapse_ratio": collapsed / self._requests if self._requests else 0.0,
+                "variant_hits": self._variant_hits,
+                "cached_entries": len(self._cache),
+            }
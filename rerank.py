@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+多查询结果融合与重排
+
+将一个问题拆分为多个子查询分别搜索后，把各自排序的webPages列表融合为统一的前N条结果，
+按URL去重。结果在每个子查询返回时增量更新，无需等待最慢的子查询。
+"""
+
+import heapq
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 去重时忽略的跟踪参数
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = ("spm", "fbclid", "gclid")
+
+METHODS = ("rrf", "combsum", "combmnz")
+
+
+def normalize_url(url):
+    """
+    归一化URL用于去重：忽略协议、大小写的主机名、www前缀、末尾斜杠、锚点和跟踪参数
+
+    参数:
+        url (str): 原始URL
+
+    返回:
+        str: 归一化后的URL
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith(_TRACKING_PREFIXES) and name.lower() not in _TRACKING_PARAMS
+    ))
+    return urlunsplit(("", host, path, query, ""))
+
+
+def _web_pages(results):
+    """从API结果或webPages列表中取出网页结果"""
+    if isinstance(results, list):
+        return results
+    if not isinstance(results, dict) or "error" in results or results.get("code") != 0:
+        return []
+    return results.get("data", {}).get("webPages", [])
+
+
+class ResultMerger:
+    """
+    增量式结果融合器
+
+    参数:
+        method (str): 融合方法，默认为rrf
+            - rrf: 倒数排名融合，得分为 权重 / (k + 排名)
+            - combsum: 各列表中归一化排名得分（1为第一名，线性递减）之和
+            - combmnz: combsum得分乘以出现该结果的列表数量
+            API返回的webPages不带相关性分数，combsum和combmnz使用基于排名的归一化得分
+        k (int): rrf的平滑常数，默认为60
+        top_n (int): top()默认返回的结果数量，默认为10
+        weights (dict, 可选): 各子查询的权重，未指定的子查询权重为1
+    """
+
+    def __init__(self, method="rrf", k=60, top_n=10, weights=None):
+        if method not in METHODS:
+            raise ValueError(f"不支持的融合方法: {method}，可选值：{', '.join(METHODS)}")
+        self.method = method
+        self.k = k
+        self.top_n = top_n
+        self.weights = weights or {}
+
+        self._scores = {}
+        self._hits = {}
+        self._best_rank = {}
+        self._pages = {}
+        self._order = {}
+        self.completed_queries = []
+
+    def add(self, query, results):
+        """
+        加入一个子查询的结果
+
+        参数:
+            query (str): 子查询
+            results (dict | list): API返回的结果或webPages列表，失败的结果会被忽略
+
+        返回:
+            int: 本次新加入或更新得分的去重后结果数量
+        """
+        self.completed_queries.append(query)
+        weight = self.weights.get(query, 1.0)
+        pages = _web_pages(results)
+        seen = set()
+
+        for rank, page in enumerate(pages, 1):
+            url = page.get("url")
+            if not url:
+                continue
+            key = normalize_url(url)
+            # 同一列表中重复的URL只计算排名最高的一次
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if self.method == "rrf":
+                score = weight / (self.k + rank)
+            else:
+                score = weight * (1 - (rank - 1) / len(pages))
+
+            if key not in self._pages:
+                self._pages[key] = dict(page, matchedQueries=[])
+                self._order[key] = len(self._order)
+                self._scores[key] = 0.0
+                self._hits[key] = 0
+                self._best_rank[key] = rank
+            else:
+                # 用后续结果补全缺失的字段（如摘要）
+                merged = self._pages[key]
+                for field, value in page.items():
+                    if value and not merged.get(field):
+                        merged[field] = value
+
+            self._pages[key]["matchedQueries"].append(query)
+            self._scores[key] += score
+            self._hits[key] += 1
+            self._best_rank[key] = min(self._best_rank[key], rank)
+
+        return len(seen)
+
+    def _score(self, key):
+        if self.method == "combmnz":
+            return self._scores[key] * self._hits[key]
+        return self._scores[key]
+
+    def top(self, n=None):
+        """
+        获取当前融合后的前N条结果
+
+        参数:
+            n (int, 可选): 返回的结果数量，默认为top_n
+
+        返回:
+            list: 网页结果，附带fusedScore（融合得分）和matchedQueries（命中的子查询）字段
+        """
+        n = self.top_n if n is None else n
+        keys = heapq.nsmallest(n, self._pages, key=lambda key: (
+            -self._score(key), self._best_rank[key], self._order[key]
+        ))
+        return [
+            dict(self._pages[key], matchedQueries=list(self._pages[key]["matchedQueries"]),
+                 fusedScore=self._score(key))
+            for key in keys
+        ]
+
+    def to_results(self, n=None):
+        """
+        以与search()返回值相同的结构输出融合结果，可直接用于format_results
+
+        返回:
+            dict: {"code": 0, "data": {"query": ..., "webPages": [...]}}
+        """
+        return {
+            "code": 0,
+            "data": {
+                "query": " | ".join(self.completed_queries),
+                "webPages": self.top(n)
+            }
+        }
+
+    def __len__(self):
+        return len(self._pages)
+
+
+def merged_search(search_client, queries, top_n=10, method="rrf", freshness=None, count=10,
+                  max_workers=8, **merger_kwargs):
+    """
+    并发执行多个子查询，并在每个子查询返回时输出最新的融合结果
+
+    参数:
+        search_client (UniFuncsSearch): 搜索客户端
+        queries (list): 子查询列表
+        top_n (int): 融合结果数量，默认为10
+        method (str): 融合方法，可选值：rrf、combsum、combmnz，默认为rrf
+        freshness (str, 可选): 结果时效性
+        count (int): 每个子查询的结果数量，默认为10
+        max_workers (int): 并发搜索的线程数量，默认为8
+        **merger_kwargs: 传递给ResultMerger的其他参数，如k、weights
+
+    返回:
+        generator: 按子查询完成顺序产生 (子查询, 该子查询的结果, 当前融合的前N条结果)
+    """
+    queries = list(dict.fromkeys(queries))
+    merger = ResultMerger(method=method, top_n=top_n, **merger_kwargs)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries))))
+    try:
+        futures = {
+            executor.submit(search_client.search, query, freshness, True, 1, count): query
+            for query in queries
+        }
+        for future in as_completed(futures):
+            query = futures[future]
+            results = future.result()
+            merger.add(query, results)
+            yield query, results, merger.top()
+    finally:
+        # 调用方提前停止迭代时不等待剩余的子查询
+        executor.shutdown(wait=False, cancel_futures=True)
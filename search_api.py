@@ -5,13 +5,19 @@ import requests
 import json
 import os
 
+try:
+    from .transport import PooledTransport
+except ImportError:
+    from transport import PooledTransport
+
 try:
     from config import DEFAULT_API_KEY
 except ImportError:
     DEFAULT_API_KEY = None
 
 class UniFuncsSearch:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, hedging_policy=None, deduplicator=None, transport=None,
+                 warmup=False):
         # 优先级：传入的API密钥 > 环境变量 > 配置文件中的默认密钥
         self.api_key = api_key or os.environ.get("UNIFUNCS_API_KEY") or DEFAULT_API_KEY
         
@@ -26,6 +32,73 @@ class UniFuncsSearch:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+        # 可选的对冲请求策略（HedgingPolicy），用于降低尾部延迟
+        self.hedging_policy = hedging_policy
+        # 可选的查询去重器（QueryDeduplicator），等价查询共享缓存结果和进行中的请求
+        self.deduplicator = deduplicator
+        # 复用连接的传输层，可在多个客户端之间共享（PooledTransport）
+        self.transport = transport or PooledTransport()
+        
+        if warmup:
+            self.warm_up()
+
+    def warm_up(self, connections=2, background=True):
+        """
+        预先解析DNS并建立到API服务器的连接，减少首次请求的延迟
+        
+        参数:
+            connections (int): 预先建立的连接数量，默认为2
+            background (bool): 是否在后台执行，默认为True
+        """
+        return self.transport.warm_up(self.base_url, connections, background)
+
+    def get_connection_stats(self):
+        """
+        获取连接统计信息
+        
+        返回:
+            dict: 冷/热请求的数量和延迟、预热耗时、DNS缓存和TLS会话复用情况
+        """
+        return self.transport.get_stats()
+
+    def _send(self, method, endpoint, **kwargs):
+        """发送单个HTTP请求并解析返回的JSON"""
+        try:
+            response = self.transport.request(method, endpoint, headers=self.headers, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": str(e), "code": -1}
+        except json.JSONDecodeError:
+            return {"error": "解析响应失败", "code": -1}
+
+    def _request(self, method, endpoint, **kwargs):
+        """发送请求，配置了对冲策略时按策略发送对冲请求"""
+        if self.hedging_policy is not None:
+            return self.hedging_policy.execute(self._send, method, endpoint, **kwargs)
+        return self._send(method, endpoint, **kwargs)
+
+    def get_hedging_stats(self):
+        """
+        获取对冲请求统计信息
+
+        返回:
+            dict: 对冲统计信息，未配置对冲策略时返回None
+        """
+        if self.hedging_policy is None:
+            return None
+        return self.hedging_policy.get_stats()
+
+    def get_dedup_stats(self):
+        """
+        获取查询去重统计信息
+
+        返回:
+            dict: 去重统计信息，未配置去重器时返回None
+        """
+        if self.deduplicator is None:
+            return None
+        return self.deduplicator.get_stats()
 
     def read_webpage(self, url, format="markdown", include_images=True, include_videos=False,
                     include_position=False, only_css_selectors=None, wait_for_css_selectors=None,
@@ -67,14 +140,7 @@ class UniFuncsSearch:
         if exclude_css_selectors:
             payload["excludeCSSSelectors"] = exclude_css_selectors
             
-        try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": str(e), "code": -1}
-        except json.JSONDecodeError:
-            return {"error": "解析响应失败", "code": -1}
+        return self._request("post", endpoint, json=payload)
 
     def read_webpage_get(self, url, format="markdown", include_images=True, include_videos=False,
                         include_position=False, only_css_selectors=None, wait_for_css_selectors=None,
@@ -107,14 +173,7 @@ class UniFuncsSearch:
         if exclude_css_selectors:
             params["excludeCSSSelectors"] = ",".join(exclude_css_selectors)
             
-        try:
-            response = requests.get(endpoint, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": str(e), "code": -1}
-        except json.JSONDecodeError:
-            return {"error": "解析响应失败", "code": -1}
+        return self._request("get", endpoint, params=params)
 
     def read_webpage_post(self, params):
         """
@@ -137,14 +196,7 @@ class UniFuncsSearch:
         """
         endpoint = f"{self.base_url}/web-reader/read"
         
-        try:
-            response = requests.post(endpoint, headers=self.headers, json=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": str(e), "code": -1}
-        except json.JSONDecodeError:
-            return {"error": "解析响应失败", "code": -1}
+        return self._request("post", endpoint, json=params)
 
     def search(self, query, freshness=None, summary=True, page=1, count=10):
         """
@@ -171,14 +223,12 @@ class UniFuncsSearch:
         if freshness:
             payload["freshness"] = freshness
             
-        try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": str(e), "code": -1}
-        except json.JSONDecodeError:
-            return {"error": "解析响应失败", "code": -1}
+        if self.deduplicator is not None:
+            return self.deduplicator.execute(
+                lambda: self._request("post", endpoint, json=payload),
+                query, freshness=freshness, summary=summary, page=page, count=count
+            )
+        return self._request("post", endpoint, json=payload)
             
     def format_results(self, results, output_format="text"):
         """
@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HTTP连接管理
+
+为UniFuncsSearch提供复用的连接池，并支持：
+1. 启动时在后台预先建立连接（预热）
+2. 带有效期的DNS解析缓存
+3. 重新建立连接时复用TLS会话，减少完整握手
+4. 统计冷请求（需要新建连接）与热请求（复用已有连接）的延迟
+"""
+
+import socket
+import ssl
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter, DEFAULT_POOLBLOCK
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 记录当前线程上的请求是否新建了连接
+_thread_state = threading.local()
+
+
+def _median(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _is_ip_address(host):
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+            return True
+        except (OSError, ValueError):
+            continue
+    return False
+
+
+class DNSCache:
+    """
+    带有效期的DNS解析缓存
+
+    参数:
+        ttl (float): 解析结果的有效期（秒），默认为300
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, host, port):
+        """
+        解析主机名
+
+        返回:
+            list: 按getaddrinfo顺序排列的IP地址；host本身是IP地址时只包含host
+        """
+        if _is_ip_address(host):
+            return [host]
+
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # 保留全部地址，第一个地址不可达时（如主机没有IPv6）依次尝试后面的地址
+        addresses = list(dict.fromkeys(
+            info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        ))
+        with self._lock:
+            self._entries[(host, port)] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host, port):
+        """删除某个主机的缓存，用于连接失败后重新解析"""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class TLSSessionCache:
+    """按主机名保存可复用的TLS会话"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        # 仍在使用的连接；TLS 1.3的会话票据在握手完成后才到达，需要在之后再读取
+        self._sockets = weakref.WeakSet()
+        self.resumed = 0
+        self.full_handshakes = 0
+
+    def get(self, hostname):
+        self._collect()
+        with self._lock:
+            return self._sessions.get(hostname)
+
+    def put(self, hostname, session):
+        if session is None or hostname is None:
+            return
+        with self._lock:
+            self._sessions[hostname] = session
+
+    def track(self, sock):
+        """记录新建立的TLS连接及其是否复用了会话"""
+        with self._lock:
+            self._sockets.add(sock)
+            if sock.session_reused:
+                self.resumed += 1
+            else:
+                self.full_handshakes += 1
+
+    def _collect(self):
+        """从仍在使用的连接中读取最新的会话"""
+        with self._lock:
+            sockets = list(self._sockets)
+        for sock in sockets:
+            try:
+                self.put(sock.server_hostname, sock.session)
+            except (OSError, ValueError):
+                continue
+
+
+class _SessionReusingSSLContext(ssl.SSLContext):
+    """在建立TLS连接时传入缓存的会话，以便服务器恢复会话"""
+
+    tls_sessions = None
+
+    def wrap_socket(self, sock, *args, server_hostname=None, **kwargs):
+        if self.tls_sessions is not None and "session" not in kwargs:
+            kwargs["session"] = self.tls_sessions.get(server_hostname)
+        # 会话过期或不可恢复时，服务器会自动进行完整握手
+        ssl_sock = super().wrap_socket(sock, *args, server_hostname=server_hostname, **kwargs)
+        if self.tls_sessions is not None:
+            self.tls_sessions.track(ssl_sock)
+        return ssl_sock
+
+
+def create_ssl_context(tls_sessions):
+    """创建复用TLS会话的SSLContext，证书校验行为与requests默认一致"""
+    context = _SessionReusingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    # 与urllib3默认的SSLContext一致：由urllib3校验主机名，以支持verify=False；
+    # 但不设置OP_NO_TICKET，否则无法通过会话票据恢复会话
+    context.check_hostname = False
+    context.hostname_checks_common_name = False
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.options |= ssl.OP_NO_COMPRESSION
+    context.load_verify_locations(DEFAULT_CA_BUNDLE_PATH)
+    context.tls_sessions = tls_sessions
+    return context
+
+
+class _CachedDNSMixin:
+    """新建连接时使用DNS缓存，并标记当前请求新建了连接"""
+
+    dns_cache = None
+    tls_sessions = None
+
+    def _new_conn(self):
+        _thread_state.new_connection = True
+        if self.dns_cache is None:
+            return super()._new_conn()
+
+        dns_host = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve(dns_host, self.port)
+        except OSError:
+            # 解析失败时交给urllib3处理，以得到与不使用缓存时相同的异常
+            return super()._new_conn()
+
+        # urllib3通过_dns_host连接，SNI和证书校验仍使用原主机名
+        try:
+            for i, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except Exception:
+                    if i == len(addresses) - 1:
+                        self.dns_cache.invalidate(dns_host, self.port)
+                        raise
+        finally:
+            self._dns_host = dns_host
+
+    def close(self):
+        if self.tls_sessions is not None and isinstance(self.sock, ssl.SSLSocket):
+            try:
+                self.tls_sessions.put(self.sock.server_hostname, self.sock.session)
+            except (OSError, ValueError):
+                pass
+        super().close()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    使用DNS缓存和TLS会话复用的连接池适配器
+
+    参数:
+        dns_cache (DNSCache, 可选): DNS缓存，为None时不缓存DNS
+        tls_sessions (TLSSessionCache, 可选): TLS会话缓存，为None时不复用TLS会话
+        **kwargs: 传递给HTTPAdapter的参数，如pool_maxsize
+    """
+
+    def __init__(self, dns_cache=None, tls_sessions=None, **kwargs):
+        self.dns_cache = dns_cache
+        self.tls_sessions = tls_sessions
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs):
+        if self.tls_sessions is not None:
+            pool_kwargs.setdefault("ssl_context", create_ssl_context(self.tls_sessions))
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+        attributes = {"dns_cache": self.dns_cache, "tls_sessions": self.tls_sessions}
+        http_connection = type("CachedHTTPConnection", (_CachedDNSMixin, HTTPConnection), attributes)
+        https_connection = type("CachedHTTPSConnection", (_CachedDNSMixin, HTTPSConnection), attributes)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("CachedHTTPConnectionPool", (HTTPConnectionPool,),
+                         {"ConnectionCls": http_connection}),
+            "https": type("CachedHTTPSConnectionPool", (HTTPSConnectionPool,),
+                          {"ConnectionCls": https_connection}),
+        }
+
+
+class PooledTransport:
+    """
+    复用连接的HTTP传输层
+
+    参数:
+        pool_size (int): 连接池大小，默认为10
+        dns_ttl (float): DNS缓存有效期（秒），为0时不缓存DNS，默认为300
+        reuse_tls_sessions (bool): 是否复用TLS会话，默认为True
+        window (int): 用于统计的最近请求延迟数量，默认为500
+    """
+
+    def __init__(self, pool_size=10, dns_ttl=300, reuse_tls_sessions=True, window=500):
+        self.dns_cache = DNSCache(dns_ttl) if dns_ttl else None
+        self.tls_sessions = TLSSessionCache() if reuse_tls_sessions else None
+        self.pool_size = pool_size
+        self.window = window
+
+        self.session = requests.Session()
+        adapter = PooledHTTPAdapter(self.dns_cache, self.tls_sessions,
+                                    pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._cold_latencies = []
+        self._warm_latencies = []
+        self._warmup_thread = None
+        self.warmup_seconds = None
+
+    def request(self, method, url, **kwargs):
+        """发送请求并记录冷/热请求延迟，参数与requests.Session.request相同"""
+        _thread_state.new_connection = False
+        started = time.monotonic()
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            self._record(time.monotonic() - started, _thread_state.new_connection)
+
+    def _record(self, latency, cold):
+        with self._lock:
+            samples = self._cold_latencies if cold else self._warm_latencies
+            samples.append(latency)
+            if len(samples) > self.window:
+                del samples[0]
+
+    def warm_up(self, url, connections=2, background=True, timeout=5):
+        """
+        预先解析DNS并建立连接，连接建立后放回连接池供后续请求复用
+
+        参数:
+            url (str): 用于预热的URL，只需与后续请求同一主机
+            connections (int): 预先建立的连接数量，默认为2
+            background (bool): 是否在后台线程中执行，默认为True
+            timeout (float): 预热请求的超时时间（秒），默认为5
+
+        返回:
+            threading.Thread: 后台执行时返回预热线程，否则返回None
+        """
+        connections = max(1, min(connections, self.pool_size))
+
+        def open_connection():
+            try:
+                # 只关心连接本身，响应内容和状态码无关紧要
+                self.session.head(url, timeout=timeout).close()
+            except requests.exceptions.RequestException:
+                pass
+
+        def run():
+            started = time.monotonic()
+            # 并发发送，才能建立多个连接，而不是反复复用同一个
+            with ThreadPoolExecutor(max_workers=connections) as executor:
+                for _ in range(connections):
+                    executor.submit(open_connection)
+            self.warmup_seconds = time.monotonic() - started
+
+        if not background:
+            run()
+            return None
+        self._warmup_thread = threading.Thread(target=run, name="unifuncs-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def get_stats(self):
+        """
+        获取连接统计信息
+
+        返回:
+            dict: 冷请求（新建了连接）与热请求（复用了连接）的数量和延迟中位数（秒），
+                  预热耗时、DNS缓存命中情况以及TLS会话复用次数
+        """
+        with self._lock:
+            stats = {
+                "cold_requests": len(self._cold_latencies),
+                "cold_latency": _median(self._cold_latencies),
+                "warm_requests": len(self._warm_latencies),
+                "warm_latency": _median(self._warm_latencies),
+                "warmup_seconds": self.warmup_seconds,
+            }
+        if self.dns_cache is not None:
+            stats["dns_hits"] = self.dns_cache.hits
+            stats["dns_misses"] = self.dns_cache.misses
+        if self.tls_sessions is not None:
+            stats["tls_resumed"] = self.tls_sessions.resumed
+            stats["tls_full_handshakes"] = self.tls_sessions.full_handshakes
+        return stats
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
@@ -6,9 +6,14 @@ import sys
 import gradio as gr
 import time
 from search_api import UniFuncsSearch
+from hedging import HedgingPolicy
+from query_normalizer import QueryDeduplicator
 
-# 创建搜索客户端
-search_client = UniFuncsSearch()
+# 创建搜索客户端，启用对冲请求以降低慢请求对页面的影响，
+# 并对归一化后等价的查询去重
+hedging_policy = HedgingPolicy()
+deduplicator = QueryDeduplicator()
+search_client = UniFuncsSearch(hedging_policy=hedging_policy, deduplicator=deduplicator)
 
 def search_web(query, api_key, freshness, result_count, output_format):
     """执行网络搜索并返回结果"""
@@ -19,7 +24,8 @@ def search_web(query, api_key, freshness, result_count, output_format):
     # 如果提供了API密钥，使用新的客户端
     client = search_client
     if api_key and api_key != search_client.api_key:
-        client = UniFuncsSearch(api_key)
+        client = UniFuncsSearch(api_key, hedging_policy=hedging_policy,
+                                transport=search_client.transport)
     
     try:
         count = int(result_count)
@@ -291,10 +297,52 @@ def create_ui():
                 inputs=[api_key_input],
                 outputs=settings_msg
             )
+            
+            hedging_stats_btn = gr.Button("查看请求统计", variant="secondary")
+            hedging_stats_output = gr.Markdown()
+            
+            def show_hedging_stats():
+                stats = hedging_policy.get_stats()
+                dedup_stats = deduplicator.get_stats()
+                connection_stats = search_client.get_connection_stats()
+                
+                def fmt_seconds(value):
+                    return f"{value:.3f}s" if value is not None else "暂无数据"
+                
+                return f"""
+                ### 对冲请求
+                - 请求总数: {stats['requests']}
+                - 对冲请求数: {stats['hedges']}（额外开销 {stats['extra_cost']:.1%}）
+                - 对冲请求胜出次数: {stats['hedge_wins']}
+                - 当前对冲阈值: {fmt_seconds(stats['hedge_delay'])}
+                - 未对冲p99延迟: {fmt_seconds(stats['p99_unhedged'])}
+                - 实际p99延迟: {fmt_seconds(stats['p99_effective'])}
+                - p99改善: {fmt_seconds(stats['p99_gain'])}
+                
+                ### 查询去重
+                - 搜索请求数: {dedup_stats['requests']}
+                - 实际API调用数: {dedup_stats['api_calls']}
+                - 合并的重复请求: {dedup_stats['collapsed']}（{dedup_stats['collapse_ratio']:.1%}）
+                - 其中由查询归一化合并: {dedup_stats['variant_hits']}
+                
+                ### 连接
+                - 连接预热耗时: {fmt_seconds(connection_stats['warmup_seconds'])}
+                - 冷请求（新建连接）: {connection_stats['cold_requests']}，延迟中位数 {fmt_seconds(connection_stats['cold_latency'])}
+                - 热请求（复用连接）: {connection_stats['warm_requests']}，延迟中位数 {fmt_seconds(connection_stats['warm_latency'])}
+                - TLS会话复用: {connection_stats.get('tls_resumed', 0)}
+                """
+            
+            hedging_stats_btn.click(
+                show_hedging_stats,
+                inputs=[],
+                outputs=hedging_stats_output
+            )
     
     return app
 
 def main():
+    # 在界面启动期间预热到API服务器的连接
+    search_client.warm_up()
     app = create_ui()
     app.launch(share=False, server_name="127.0.0.1")
 